@@ -1,15 +1,79 @@
-import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pac
+import pyarrow.parquet as pq
 import zipfile
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 # Define the input zip file and output directory
 zip_file_path = 'gtfs_subway.zip'
 output_dir = 'cleaned_gtfs_data'
 
+# Parse GTFS date columns as raw 'YYYYMMDD' text rather than letting Arrow infer integers,
+# keep stop times as text (values past midnight such as 25:30:00 are not valid Arrow times),
+# and treat blank strings as missing (matching pandas.read_csv)
+csv_convert_options = pac.ConvertOptions(
+    column_types={col: pa.string() for col in ['date', 'start_date', 'end_date', 'arrival_time', 'departure_time']},
+    strings_can_be_null=True,
+)
+
 # Create output directory if it doesn't exist
 if not os.path.exists(output_dir):
     os.makedirs(output_dir)
 
+def _clean_one(zip_path, file_name, output_path):
+    """Cleans a single GTFS file from the zip and returns its report lines.
+    Runs in a worker process, so it opens its own read-only handle on the zip."""
+    log = [f"\n--- Processing {file_name} ---"]
+
+    with zipfile.ZipFile(zip_path, 'r') as z:
+        # Read the CSV file directly from the zip
+        # GTFS files are CSVs despite the .txt extension
+        # Arrow's C++ parser is much faster than pandas on large files
+        try:
+            # Single-threaded parse: the files themselves are already spread across
+            # one worker process per CPU
+            table = pac.read_csv(pa.BufferReader(z.read(file_name)),
+                                 read_options=pac.ReadOptions(use_threads=False),
+                                 convert_options=csv_convert_options)
+        except pa.ArrowInvalid as e:
+            log.append(f"Skipping {file_name}: Could not parse file ({e}).")
+            return log
+    df = table.to_pandas()
+
+    # 1. Identify columns with > 10% missing values
+    missing_percent = df.isnull().mean() * 100
+    high_missing_cols = missing_percent[missing_percent > 10]
+    
+    if not high_missing_cols.empty:
+        log.append("Columns with > 10% missing values:")
+        for col, pct in high_missing_cols.items():
+            log.append(f"  - {col}: {pct:.2f}%")
+    else:
+        log.append("No columns found with > 10% missing values.")
+
+    # 2. Standardize Date Columns to YYYY-MM-DD
+    # Common GTFS date columns: 'date', 'start_date', 'end_date'
+    date_cols = [col for col in df.columns if 'date' in col.lower()]
+    
+    if date_cols:
+        log.append(f"Standardizing date columns: {date_cols}")
+        for col in date_cols:
+            # GTFS dates are fixed-width 'YYYYMMDD' strings, so plain string
+            # slicing gives 'YYYY-MM-DD' without building datetime objects
+            s = df[col].astype('string')
+            # Anything that is not 8 digits becomes missing
+            is_valid = s.str.fullmatch(r'\d{8}', na=False)
+            df[col] = (s.str[:4] + '-' + s.str[4:6] + '-' + s.str[6:8]).where(is_valid)
+    
+    # Save the cleaned dataframe as Parquet (typed, columnar and compressed,
+    # so gtfs_to_sql.py does not have to re-parse text)
+    output_file = os.path.join(output_path, file_name.replace('.txt', '_cleaned.parquet'))
+    # Write without the pandas index
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), output_file, compression='zstd')
+    log.append(f"Saved cleaned file to: {output_file}")
+    return log
+
 def clean_gtfs_data(zip_path, output_path):
     print(f"Processing {zip_path}...")
     
@@ -17,55 +81,19 @@ def clean_gtfs_data(zip_path, output_path):
         with zipfile.ZipFile(zip_path, 'r') as z:
             # List all text files in the zip
             files = [f for f in z.namelist() if f.endswith('.txt')]
-            
-            for file_name in files:
-                print(f"\n--- Processing {file_name} ---")
-                
-                # Read the CSV file directly from the zip
-                # GTFS files are CSVs despite the .txt extension
-                try:
-                    df = pd.read_csv(z.open(file_name))
-                except pd.errors.EmptyDataError:
-                    print(f"Skipping {file_name}: File is empty.")
-                    continue
-
-                # 1. Identify columns with > 10% missing values
-                missing_percent = df.isnull().mean() * 100
-                high_missing_cols = missing_percent[missing_percent > 10]
-                
-                if not high_missing_cols.empty:
-                    print("Columns with > 10% missing values:")
-                    for col, pct in high_missing_cols.items():
-                        print(f"  - {col}: {pct:.2f}%")
-                else:
-                    print("No columns found with > 10% missing values.")
-
-                # 2. Standardize Date Columns to YYYY-MM-DD
-                # Common GTFS date columns: 'date', 'start_date', 'end_date'
-                date_cols = [col for col in df.columns if 'date' in col.lower()]
-                
-                if date_cols:
-                    print(f"Standardizing date columns: {date_cols}")
-                    for col in date_cols:
-                        # GTFS dates are typically strings like 'YYYYMMDD'
-                        # We convert them to datetime objects, then to 'YYYY-MM-DD' strings
-                        try:
-                            # Coerce errors to NaT to handle invalid formats gracefully
-                            df[col] = pd.to_datetime(df[col], format='%Y%m%d', errors='coerce')
-                            df[col] = df[col].dt.strftime('%Y-%m-%d')
-                        except Exception as e:
-                            print(f"  Warning: Could not standardize column '{col}': {e}")
-                
-                # Save the cleaned dataframe to a new CSV
-                output_file = os.path.join(output_path, file_name.replace('.txt', '_cleaned.csv'))
-                # Write to CSV, ensuring no index is saved
-                df.to_csv(output_file, index=False)
-                print(f"Saved cleaned file to: {output_file}")
-
     except FileNotFoundError:
         print(f"Error: The file {zip_path} was not found.")
+        return
     except zipfile.BadZipFile:
         print(f"Error: The file {zip_path} is not a valid zip file.")
+        return
+
+    # Files are independent, so clean them in parallel (one worker per CPU);
+    # reports are printed in file order once each file is done
+    with ProcessPoolExecutor() as executor:
+        n = len(files)
+        for log in executor.map(_clean_one, [zip_path] * n, files, [output_path] * n):
+            print("\n".join(log))
 
 # Run the cleaning function
 if __name__ == "__main__":
@@ -1,43 +1,40 @@
 import sqlite3
 import pandas as pd
-import networkx as nx
-import math
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
 import os
 
 # Configuration
 db_path = 'subway_network.db'
-SUBWAY_SPEED_MPS = 10  # Estimate: 10 meters/sec (approx 36 km/h or 22 mph)
-R = 6371000  # Radius of Earth in meters
-
-# Heuristic
-def haversine(lat1, lon1, lat2, lon2):
-    """Calculates the great-circle distance between two points (in meters)."""
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    
-    a = math.sin(dphi / 2)**2 + \
-        math.cos(phi1) * math.cos(phi2) * \
-        math.sin(dlambda / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
 
 def build_network_and_predict():
     if not os.path.exists(db_path):
         print(f"Error: Database '{db_path}' not found. Run Part 1 script first.")
         return
 
-    print("--- Part 2: Network Analysis & A* Prediction ---")
-    conn = sqlite3.connect(db_path)
+    print("--- Part 2: Network Analysis & Shortest Path Prediction ---")
+    # Read-only connection; reads go through a memory map of the database file
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    conn.execute("PRAGMA mmap_size=2147483648")
 
-    # 1. Load Nodes (Stops with Coordinates)
+    # 1. Load Nodes (Stops)
+    # Plain tuples straight from the cursor, no intermediate DataFrame
     print("Loading stops...")
-    stops_query = "SELECT stop_id, stop_name, stop_lat, stop_lon FROM stops"
-    stops_df = pd.read_sql(stops_query, conn)
+    stops_query = "SELECT stop_id, stop_name FROM stops"
+    rows = conn.execute(stops_query).fetchall()
     
-    # Create lookup dicts for names and coordinates
-    stop_name_map = stops_df.set_index('stop_id')['stop_name'].to_dict()
-    stop_coords = stops_df.set_index('stop_id')[['stop_lat', 'stop_lon']].to_dict('index')
+    # Build the name lookup and the integer index of every stop (row/column of the
+    # adjacency matrix) in a single pass over the rows
+    # stop_names is indexed by the integer node id, so the search and the
+    # path printing never touch string keys
+    stop_names = []
+    stop_name_map = {}
+    stop_id_to_idx = {}
+    for i, (sid, name) in enumerate(rows):
+        stop_names.append(name)
+        stop_name_map[sid] = name
+        stop_id_to_idx[sid] = i
 
     # 2. Load Edges (Trip Segments & Transfers)
     print("Loading network edges...")
@@ -60,56 +57,51 @@ def build_network_and_predict():
     transfer_edges_df = pd.read_sql(transfer_query, conn)
     conn.close()
 
-    # 3. Build the Graph
-    G = nx.DiGraph()
-    
-    # Add Nodes
-    G.add_nodes_from(stops_df['stop_id'])
-    nx.set_node_attributes(G, stop_name_map, 'name')
-    nx.set_node_attributes(G, stop_coords, 'coords')
-
-    # Add Edges
-    for _, row in trip_edges_df.iterrows():
-        G.add_edge(row['from_stop_id'], row['to_stop_id'], 
-                   weight=row['weight'], type='travel', route=row['route_id'])
-                   
-    for _, row in transfer_edges_df.iterrows():
-        if G.has_node(row['from_stop_id']) and G.has_node(row['to_stop_id']):
-            G.add_edge(row['from_stop_id'], row['to_stop_id'], 
-                       weight=row['weight'], type='transfer')
-
-    print(f"Graph built: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges.")
-
-    # 4. Define A* Heuristic Function
-    def heuristic(u, v):
-        # Estimate travel time between stop u and stop v based on distance.
-        try:
-            # Get coordinates from the graph node attributes
-            u_coords = G.nodes[u]['coords']
-            v_coords = G.nodes[v]['coords']
-            
-            dist = haversine(u_coords['stop_lat'], u_coords['stop_lon'],
-                             v_coords['stop_lat'], v_coords['stop_lon'])
-            
-            # Return estimated time in seconds
-            return dist / SUBWAY_SPEED_MPS
-        except KeyError:
-            return 0
+    # 3. Build the Graph (CSR adjacency matrix over stop indices)
+    trip_edges_df['type'] = 'travel'
+    transfer_edges_df['type'] = 'transfer'
+    edges_df = pd.concat([trip_edges_df, transfer_edges_df], ignore_index=True)
+    edges_df['from_idx'] = edges_df['from_stop_id'].map(stop_id_to_idx)
+    edges_df['to_idx'] = edges_df['to_stop_id'].map(stop_id_to_idx)
+
+    # Drop edges to unknown stops; a transfer replaces any travel edge between the same
+    # pair (csr_matrix would otherwise sum duplicate entries)
+    edges_df = edges_df.dropna(subset=['from_idx', 'to_idx', 'weight'])
+    edges_df = edges_df.astype({'from_idx': int, 'to_idx': int})
+    edges_df = edges_df.drop_duplicates(subset=['from_idx', 'to_idx'], keep='last')
+
+    n = len(stop_names)
+    graph = csr_matrix((edges_df['weight'].values.astype(float),
+                        (edges_df['from_idx'].values, edges_df['to_idx'].values)),
+                       shape=(n, n))
+    edge_attrs = edges_df.set_index(['from_idx', 'to_idx'])
+
+    print(f"Graph built: {n} nodes, {graph.nnz} edges.")
 
-    # 5. Execute Prediction
+    # 4. Execute Prediction
     # Example: Van Cortlandt Park (101S) -> South Ferry (142S)
     start_node = '101S'
     end_node = '142S' 
     
     print(f"\nCalculating shortest path from {stop_name_map.get(start_node, start_node)} to {stop_name_map.get(end_node, end_node)}...")
 
-    if G.has_node(start_node) and G.has_node(end_node):
-        try:
-            # Run A* Algorithm
-            path = nx.astar_path(G, start_node, end_node, heuristic=heuristic, weight='weight')
-            total_seconds = nx.astar_path_length(G, start_node, end_node, heuristic=heuristic, weight='weight')
-            
-            print("\n--- Route Prediction Successful (A*) ---")
+    if start_node in stop_id_to_idx and end_node in stop_id_to_idx:
+        source, target = stop_id_to_idx[start_node], stop_id_to_idx[end_node]
+
+        # Run Dijkstra from the origin in compiled code
+        dist, pred = dijkstra(graph, directed=True, indices=source, return_predecessors=True)
+        total_seconds = dist[target]
+
+        if np.isinf(total_seconds):
+            print(f"No path found between {start_node} and {end_node}.")
+        else:
+            # Walk the predecessor array back from the destination (integer node ids)
+            path = [target]
+            while path[-1] != source:
+                path.append(int(pred[path[-1]]))
+            path.reverse()
+
+            print("\n--- Route Prediction Successful (Dijkstra) ---")
             print(f"Origin:      {stop_name_map[start_node]} ({start_node})")
             print(f"Destination: {stop_name_map[end_node]} ({end_node})")
             print(f"Total Time:  {total_seconds / 60:.1f} minutes")
@@ -119,12 +111,9 @@ def build_network_and_predict():
             print("\nRoute Segment (First 5 stops):")
             for i in range(min(5, len(path)-1)):
                 u, v = path[i], path[i+1]
-                edge = G[u][v]
-                mode = f"Take {edge.get('route')} line" if edge.get('type') == 'travel' else "Transfer/Walk"
-                print(f"  {i+1}. {stop_name_map.get(u)} -> {stop_name_map.get(v)} ({mode}, {edge['weight']}s)")
-                
-        except nx.NetworkXNoPath:
-            print(f"No path found between {start_node} and {end_node}.")
+                edge = edge_attrs.loc[(u, v)]
+                mode = f"Take {edge['route_id']} line" if edge['type'] == 'travel' else "Transfer/Walk"
+                print(f"  {i+1}. {stop_names[u]} -> {stop_names[v]} ({mode}, {edge['weight']}s)")
     else:
         print("Error: Start or End node not found in graph.")
 
@@ -1,60 +1,93 @@
 import pandas as pd
-import zipfile
+import pyarrow.parquet as pq
 import sqlite3
 import os
 
 # Configuration
-zip_file_path = 'gtfs_subway.zip'
+input_dir = 'cleaned_gtfs_data'  # Parquet output of clean_gtfs.py
 db_path = 'subway_network.db'
+STOP_TIMES_BATCH_SIZE = 200_000  # Rows of stop_times streamed per chunk
 
-def gtfs_time_to_seconds(time_str):
-    """Converts GTFS 'HH:MM:SS' string to seconds from midnight.
-    Handles times > 24:00:00 (e.g., 25:30:00)."""
-    if pd.isna(time_str):
-        return None
-    try:
-        parts = time_str.split(':')
-        return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-    except:
-        return None
+def gtfs_time_to_seconds(time_col):
+    """Converts a column of GTFS 'HH:MM:SS' strings to seconds from midnight.
+    Handles times > 24:00:00 (e.g., 25:30:00). Blank or malformed times become <NA>."""
+    parts = time_col.astype('string').str.split(':', expand=True).reindex(columns=range(3))
+    # Coerce each component so bad values propagate as NaN instead of raising
+    parts = parts.apply(pd.to_numeric, errors='coerce').astype('Int32')
+    return parts[0] * 3600 + parts[1] * 60 + parts[2]
+
+def cleaned_path(filename):
+    """Path of the cleaned Parquet file that clean_gtfs.py writes for a GTFS .txt file."""
+    return os.path.join(input_dir, filename.replace('.txt', '_cleaned.parquet'))
 
 def build_database():
+    if not os.path.exists(input_dir):
+        print(f"Error: Cleaned data directory '{input_dir}' not found. Run clean_gtfs.py first.")
+        return
+
     # 1. Connect to SQLite (creates file if does not exists)
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
+
+    # Bulk-load settings: WAL without per-insert fsync, large page cache, memory temp tables
+    cursor.executescript("""
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA cache_size=-262144;       -- 256MB
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=2147483648;
+    """)
     
     print(f"Building database at: {db_path}")
 
-    with zipfile.ZipFile(zip_file_path, 'r') as z:
-        # --- A. Load Static Tables ---
-        # We load these directly as they don't need complex transformation
-        static_files = ['stops.txt', 'routes.txt', 'trips.txt', 'calendar.txt', 'transfers.txt']
-        
-        for filename in static_files:
-            if filename in z.namelist():
-                print(f"Loading {filename} into SQL...")
-                df = pd.read_csv(z.open(filename))
-                # Remove table if exists
-                table_name = filename.replace('.txt', '')
-                df.to_sql(table_name, conn, if_exists='replace', index=False)
+    # --- A. Load Static Tables ---
+    # We load these directly as they don't need complex transformation
+    static_files = ['stops.txt', 'routes.txt', 'trips.txt', 'calendar.txt', 'transfers.txt']
+    
+    for filename in static_files:
+        if os.path.exists(cleaned_path(filename)):
+            print(f"Loading {filename} into SQL...")
+            # Parquet is typed and columnar, so there is no CSV to re-parse
+            df = pq.read_table(cleaned_path(filename)).to_pandas()
+            # Remove table if exists
+            table_name = filename.replace('.txt', '')
+            df.to_sql(table_name, conn, if_exists='replace', index=False)
 
-        # --- B. Load & Transform stop_times.txt ---
-        # This needs special handling for time calculation
-        if 'stop_times.txt' in z.namelist():
-            print("Loading and transforming stop_times.txt (this may take a moment)...")
-            df_st = pd.read_csv(z.open('stop_times.txt'))
-            
-            # Convert HH:MM:SS to Seconds for math
-            df_st['arrival_time_sec'] = df_st['arrival_time'].apply(gtfs_time_to_seconds)
-            df_st['departure_time_sec'] = df_st['departure_time'].apply(gtfs_time_to_seconds)
-            
-            # Indexing columns to speed up the SQL window functions later
-            df_st.to_sql('stop_times', conn, if_exists='replace', index=False)
-            
-            # Create indices for performance
-            print("Creating indices...")
-            cursor.execute("CREATE INDEX idx_trip_seq ON stop_times (trip_id, stop_sequence)")
-            cursor.execute("CREATE INDEX idx_stop_id ON stop_times (stop_id)")
+    # --- B. Load & Transform stop_times.txt ---
+    # This needs special handling for time calculation
+    if os.path.exists(cleaned_path('stop_times.txt')):
+        print("Loading and transforming stop_times.txt (this may take a moment)...")
+        cursor.execute("DROP TABLE IF EXISTS stop_times")
+
+        # Stream the file chunk by chunk (constant memory) and insert every
+        # chunk inside a single transaction
+        with conn:
+            insert_sql = None
+            for batch in pq.ParquetFile(cleaned_path('stop_times.txt')).iter_batches(batch_size=STOP_TIMES_BATCH_SIZE):
+                df_st = batch.to_pandas()
+
+                # Convert HH:MM:SS to Seconds for math
+                df_st['arrival_time_sec'] = gtfs_time_to_seconds(df_st['arrival_time'])
+                df_st['departure_time_sec'] = gtfs_time_to_seconds(df_st['departure_time'])
+
+                if insert_sql is None:
+                    # Create the table schema from the first chunk
+                    df_st.head(0).to_sql('stop_times', conn, index=False)
+                    placeholders = ', '.join(['?'] * len(df_st.columns))
+                    insert_sql = f"INSERT INTO stop_times VALUES ({placeholders})"
+
+                # Plain Python values (None for missing) so sqlite3 can bind them
+                rows = df_st.astype(object).where(df_st.notna(), None)
+                cursor.executemany(insert_sql, rows.itertuples(index=False, name=None))
+        
+        # Create indices for performance
+        print("Creating indices...")
+        # Covering index: the LEAD() window over (trip_id, stop_sequence) is answered from the index alone
+        cursor.execute("""CREATE INDEX idx_trip_seq_cover
+                          ON stop_times (trip_id, stop_sequence, stop_id, arrival_time_sec, departure_time_sec)""")
+        # Index lookups for the JOIN to trips
+        cursor.execute("CREATE INDEX idx_trips_trip_id ON trips (trip_id)")
+        cursor.execute("CREATE INDEX idx_stop_id ON stop_times (stop_id)")
 
     # --- C. Feature Preparation: The Network Graph ---
     # We use SQL Window Functions to link current stop -> next stop
@@ -100,6 +133,7 @@ def build_database():
     sample = pd.read_sql("SELECT * FROM trip_segments LIMIT 5", conn)
     print(sample)
     
+    cursor.execute("PRAGMA optimize")
     conn.close()
 
 if __name__ == "__main__":